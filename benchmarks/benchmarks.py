@@ -0,0 +1,581 @@
+"""Benchmarks for the hot paths of the Python snippets.
+
+Run from anywhere with ``python benchmarks/benchmarks.py``. Running it
+from inside python/ would let the snippet files shadow the libraries
+they are named after.
+"""
+import argparse
+import ast
+import gc
+import itertools
+import json
+import pathlib
+import platform
+import sys
+import time
+import tracemalloc
+from types import ModuleType
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+import sklearn.linear_model
+
+SNIPPETS_DIR = pathlib.Path(__file__).resolve().parent.parent / "python"
+
+
+def load_snippets(filename: str, names: Sequence[str] = ()) -> ModuleType:
+    """
+    Load the definitions of a snippet file as a module.
+
+    Snippet files mix definitions with example code that refers to
+    undefined names, so only imports, functions, classes, and the
+    assignments in names are run.
+
+    Parameters
+    ----------
+    filename : str
+        The snippet file in python/.
+    names : Sequence[str]
+        Module level variables to also assign.
+
+    Returns
+    -------
+    ModuleType
+        The loaded definitions.
+    """
+    path = SNIPPETS_DIR / filename
+    tree = ast.parse(path.read_text())
+    tree.body = [
+        node
+        for node in tree.body
+        if isinstance(
+            node, (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef)
+        )
+        or (
+            isinstance(node, ast.Assign)
+            and any(
+                isinstance(target, ast.Name) and target.id in names
+                for target in node.targets
+            )
+        )
+    ]
+    module = ModuleType(f"snippets_{path.stem.replace('-', '_')}")
+    module.__file__ = str(path)
+    exec(compile(tree, str(path), "exec"), module.__dict__)
+    return module
+
+
+def make_frame(
+    n_rows: int,
+    cardinality: int = 100,
+    missing: float = 0.1,
+    n_cont: int = 5,
+    n_cat: int = 3,
+    n_sections: int = 4,
+    seed: int = 0,
+) -> DataFrame:
+    """
+    Make a synthetic feature matrix shaped like the snippets' inputs.
+
+    Parameters
+    ----------
+    n_rows : int
+        The number of rows.
+    cardinality : int, default=100
+        The number of levels of each categorical feature.
+    missing : float, default=0.1
+        The share of missing values in each feature.
+    n_cont : int, default=5
+        The number of float64 continuous features, named cont_0, ...
+    n_cat : int, default=3
+        The number of object dtype categorical features, named cat_0, ...
+    n_sections : int, default=4
+        The number of levels of the section column.
+    seed : int, default=0
+        The random seed.
+
+    Returns
+    -------
+    DataFrame
+        The features plus section, an int64 quantity, and a float target.
+    """
+    rng = np.random.default_rng(seed)
+    data = {}
+    for feature in range(n_cont):
+        values = rng.normal(size=n_rows)
+        values[rng.random(n_rows) < missing] = np.nan
+        data[f"cont_{feature}"] = values
+    levels = np.array([f"level_{level}" for level in range(cardinality)], dtype=object)
+    for feature in range(n_cat):
+        values = levels[rng.integers(0, cardinality, size=n_rows)]
+        values[rng.random(n_rows) < missing] = np.nan
+        data[f"cat_{feature}"] = values
+    data["section"] = rng.integers(0, n_sections, size=n_rows)
+    data["quantity"] = rng.integers(0, 1000, size=n_rows)
+    data["target"] = rng.normal(size=n_rows)
+    return pd.DataFrame(data)
+
+
+def _features(X: DataFrame) -> Tuple[List[str], List[str]]:
+    return (
+        [column for column in X if column.startswith("cont_")],
+        [column for column in X if column.startswith("cat_")],
+    )
+
+
+def _section_kfold_split(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("scikit-learn.py")
+    cv = snippets.SectionKFold(n_splits=5)
+    return lambda: sum(1 for _ in cv.split(X, "section"))
+
+
+def _preprocess_fit_transform(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("scikit-learn.py")
+    cont, cat = _features(X)
+    return lambda: snippets.make_preprocess_pipe(cont, cat, []).fit_transform(X)
+
+
+def _categorical_feature_names(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("scikit-learn.py")
+    cont, cat = _features(X)
+    pipeline = snippets.make_full_pipeline(
+        snippets.make_preprocess_pipe(cont, cat, []), sklearn.linear_model.Ridge()
+    ).fit(X, X["target"])
+    return lambda: snippets.get_categorical_feature_names(
+        pipeline, "cat_features", cat
+    )
+
+
+def _early_stop_xgb(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("xgboost.py")
+    cont, _ = _features(X)
+
+    def fit() -> Any:
+        # The split draws from the global random state, and a different
+        # split stops after a different number of rounds
+        np.random.seed(0)
+        return snippets.early_stop_xgb(
+            X[cont], X["target"], "rmse", 5, 0.2, "regressor", n_estimators=50
+        )
+
+    return fit
+
+
+def _altair_theme(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("altair.py")
+    alt = snippets.alt
+    alt.data_transformers.disable_max_rows()
+
+    def render() -> Dict[str, Any]:
+        alt.themes.register("material", snippets.material)
+        alt.themes.enable("material")
+        return alt.Chart(X).mark_point().encode(x="cont_0", y="cont_1").to_dict()
+
+    return render
+
+
+def _plotly_theme(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("plotly.py", names=["material_theme"])
+    go = snippets.go
+    return lambda: go.Figure(
+        go.Scattergl(x=X["cont_0"], y=X["cont_1"], mode="markers"),
+        layout={"template": snippets.material_theme},
+    ).to_json()
+
+
+def _case_when(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("pandas.py")
+    conditions = [
+        lambda c, level=level: c["quantity"] < level for level in range(50, 1001, 50)
+    ]
+    choices = [f"under_{level}" for level in range(50, 1001, 50)]
+    return lambda: snippets.case_when(
+        X, conditions, choices, default="other", columns=["quantity"]
+    )
+
+
+def _streaming_agg(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("pandas.py")
+    chunk_size = max(X.shape[0] // 10, 1)
+    starts = range(0, X.shape[0], chunk_size)
+    # In process, since spawned workers can't import the loaded snippets
+    return lambda: snippets.streaming_agg(
+        (X.iloc[start : start + chunk_size] for start in starts),
+        "cat_0",
+        n_jobs=1,
+        sum_quantity=("quantity", "sum"),
+        std_cont=("cont_0", "std"),
+    )
+
+
+def _merge_any(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("pandas.py")
+    rng = np.random.default_rng(0)
+    n_rows = X.shape[0]
+    left = pd.DataFrame({"id": rng.integers(0, n_rows, size=n_rows)})
+    right = pd.DataFrame(
+        {
+            "id1": rng.integers(0, n_rows, size=n_rows),
+            "id2": rng.integers(0, n_rows, size=n_rows),
+        }
+    )
+    return lambda: snippets.merge_any(left, right, "id", ["id1", "id2"])
+
+
+def _unzip_numpy(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("python.py")
+    records = list(zip(X["cont_0"].tolist(), X["cont_1"].tolist()))
+    return lambda: snippets.unzip_numpy(records)
+
+
+def _shrink_features(X: DataFrame) -> Callable[[], Any]:
+    snippets = load_snippets("scikit-learn.py")
+    cont, cat = _features(X)
+    return lambda: snippets.shrink_features(X, [*cont, "quantity"], cat, ["target"])
+
+
+# Case names mapped to a setup that returns the call to measure, and the
+# largest number of rows to run it on
+CASES: Dict[str, Tuple[Callable[[DataFrame], Callable[[], Any]], Optional[int]]] = {
+    "SectionKFold.split": (_section_kfold_split, None),
+    "make_preprocess_pipe.fit_transform": (_preprocess_fit_transform, None),
+    "get_categorical_feature_names": (_categorical_feature_names, None),
+    "early_stop_xgb": (_early_stop_xgb, None),
+    "altair.material": (_altair_theme, 100_000),
+    "plotly.material_theme": (_plotly_theme, 100_000),
+    "case_when": (_case_when, None),
+    "streaming_agg": (_streaming_agg, None),
+    "merge_any": (_merge_any, None),
+    "unzip_numpy": (_unzip_numpy, 1_000_000),
+    "shrink_features": (_shrink_features, None),
+}
+
+
+def measure(
+    func: Callable[[], Any], repeat: int = 3, min_time: float = 0.2
+) -> Dict[str, float]:
+    """
+    Measure the wall time and peak traced memory of a call.
+
+    Parameters
+    ----------
+    func : Callable[[], Any]
+        The call to measure.
+    repeat : int, default=3
+        The minimum number of timed runs. The fastest is kept.
+    min_time : float, default=0.2
+        Keep timing runs until they add up to this many seconds, so the
+        fastest run of a quick call is stable.
+
+    Returns
+    -------
+    Dict[str, float]
+        The seconds of the fastest run and the peak bytes traced by
+        tracemalloc in one more run. Memory allocated outside of
+        Python's allocators, e.g. by XGBoost, is not traced.
+    """
+    timings: List[float] = []
+    # As timeit does, keep garbage collection out of the timings
+    gc.collect()
+    gc.disable()
+    try:
+        while len(timings) < repeat or sum(timings) < min_time:
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    finally:
+        gc.enable()
+    # Separate run since tracemalloc slows down allocations
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": min(timings), "peak_bytes": peak}
+
+
+def run(
+    cases: Sequence[str],
+    sizes: Sequence[int],
+    cardinalities: Sequence[int],
+    missing_rates: Sequence[float],
+    repeat: int = 3,
+    min_time: float = 0.2,
+    output: Optional[pathlib.Path] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Measure each case on each combination of data parameters.
+
+    A case that raises is recorded with its error instead of stopping
+    the run.
+
+    Parameters
+    ----------
+    cases : Sequence[str]
+        The names of the cases in CASES to run.
+    sizes : Sequence[int]
+        The numbers of rows.
+    cardinalities : Sequence[int]
+        The numbers of levels of the categorical features.
+    missing_rates : Sequence[float]
+        The shares of missing values.
+    repeat : int, default=3
+        The minimum number of timed runs per measurement.
+    min_time : float, default=0.2
+        The minimum total seconds of timed runs per measurement.
+    output : Optional[pathlib.Path]
+        Where to write the results as JSON, rewritten after each case so
+        an interrupted run keeps its measurements.
+
+    Returns
+    -------
+    List[Dict[str, Any]]
+        A result per case and parameter combination.
+    """
+    results = []
+    for n_rows, cardinality, missing in itertools.product(
+        sizes, cardinalities, missing_rates
+    ):
+        X = make_frame(n_rows, cardinality=cardinality, missing=missing)
+        for case in cases:
+            setup, max_rows = CASES[case]
+            if max_rows is not None and n_rows > max_rows:
+                continue
+            result = {
+                "case": case,
+                "n_rows": n_rows,
+                "cardinality": cardinality,
+                "missing": missing,
+            }
+            label = f"{case:<36} {n_rows:>10} {cardinality:>6} {missing:>5}"
+            try:
+                result.update(measure(setup(X), repeat=repeat, min_time=min_time))
+            except Exception as error:
+                result["error"] = f"{type(error).__name__}: {error}"
+                print(f"{label} {result['error'].splitlines()[0]}")
+            else:
+                print(
+                    f"{label} {result['seconds']:>10.4f} s"
+                    f" {result['peak_bytes'] / 2**20:>10.1f} MiB"
+                )
+            results.append(result)
+            if output is not None:
+                write_results(output, results)
+    return results
+
+
+def remeasure(
+    result: Dict[str, Any], repeat: int = 3, min_time: float = 0.2
+) -> None:
+    """
+    Measure the case of a result again and keep the better measurements.
+
+    Parameters
+    ----------
+    result : Dict[str, Any]
+        A result from run, updated in place.
+    repeat : int, default=3
+        The minimum number of timed runs.
+    min_time : float, default=0.2
+        The minimum total seconds of timed runs.
+    """
+    X = make_frame(
+        result["n_rows"], cardinality=result["cardinality"], missing=result["missing"]
+    )
+    setup, _ = CASES[result["case"]]
+    again = measure(setup(X), repeat=repeat, min_time=min_time)
+    for metric in ("seconds", "peak_bytes"):
+        result[metric] = min(result[metric], again[metric])
+
+
+def write_results(path: pathlib.Path, results: List[Dict[str, Any]]) -> None:
+    """
+    Write results as JSON along with the Python version and platform.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The file to write.
+    results : List[Dict[str, Any]]
+        The results from run.
+    """
+    path.write_text(
+        json.dumps(
+            {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+
+
+def compare(
+    baseline: List[Dict[str, Any]],
+    results: List[Dict[str, Any]],
+    threshold: float,
+    min_seconds: float = 0.005,
+    min_bytes: int = 2**20,
+) -> List[str]:
+    """
+    Find errors, and results slower or larger than the baseline by more
+    than threshold.
+
+    Increases smaller than min_seconds or min_bytes are ignored, since
+    they are within the noise of quick cases.
+
+    Parameters
+    ----------
+    baseline : List[Dict[str, Any]]
+        Results from an earlier run.
+    results : List[Dict[str, Any]]
+        Results from this run.
+    threshold : float
+        The allowed relative increase, e.g. 0.2 for 20%.
+    min_seconds : float, default=0.005
+        The smallest increase in seconds that counts as a regression.
+    min_bytes : int, default=2**20
+        The smallest increase in peak bytes that counts as a regression.
+
+    Returns
+    -------
+    List[str]
+        A description of each regression.
+    """
+
+    def key(result: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (
+            result["case"],
+            result["n_rows"],
+            result["cardinality"],
+            result["missing"],
+        )
+
+    baseline_by_key = {key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        if "error" in result:
+            regressions.append(
+                f"{key(result)} error: {result['error'].splitlines()[0]}"
+            )
+            continue
+        previous = baseline_by_key.get(key(result))
+        if previous is None or "error" in previous:
+            continue
+        for metric, min_difference in (
+            ("seconds", min_seconds),
+            ("peak_bytes", min_bytes),
+        ):
+            if result[metric] > max(
+                previous[metric] * (1 + threshold), previous[metric] + min_difference
+            ):
+                regressions.append(
+                    f"{key(result)} {metric}: {previous[metric]:.4g}"
+                    f" -> {result[metric]:.4g}"
+                )
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        choices=list(CASES),
+        default=list(CASES),
+        metavar="CASE",
+        help=f"Cases to run, from {', '.join(CASES)}.",
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=lambda size: int(float(size)),
+        default=[10_000, 100_000, 1_000_000, 10_000_000],
+        help="Numbers of rows, e.g. 1e4 1e7.",
+    )
+    parser.add_argument("--cardinalities", nargs="+", type=int, default=[100])
+    parser.add_argument("--missing-rates", nargs="+", type=float, default=[0.1])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="Repeat each call until the runs add up to this many seconds.",
+    )
+    parser.add_argument(
+        "--output", type=pathlib.Path, default=pathlib.Path("benchmarks.json")
+    )
+    parser.add_argument(
+        "--baseline",
+        type=pathlib.Path,
+        default=None,
+        help="Results JSON from an earlier run to compare against.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Fail if a result is this much slower or larger than the baseline.",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=2,
+        help="Measure regressed cases again up to this many times.",
+    )
+    parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.005,
+        help="Ignore slowdowns smaller than this many seconds.",
+    )
+    args = parser.parse_args(argv)
+    baseline = None
+    if args.baseline is not None:
+        # Results are written as they come in, which would overwrite the
+        # baseline before it is compared against
+        if args.baseline.resolve() == args.output.resolve():
+            parser.error("--output must be a different file from --baseline.")
+        baseline = json.loads(args.baseline.read_text())["results"]
+    results = run(
+        args.cases,
+        args.sizes,
+        args.cardinalities,
+        args.missing_rates,
+        args.repeat,
+        args.min_time,
+        output=args.output,
+    )
+    if baseline is None:
+        return 0
+    for _ in range(args.retries):
+        # A busy moment on the machine looks like a regression, while a
+        # real one stays slow when measured again
+        regressed = [
+            result
+            for result in results
+            if "error" not in result
+            and compare(baseline, [result], args.threshold, args.min_seconds)
+        ]
+        if not regressed:
+            break
+        for result in regressed:
+            remeasure(result, args.repeat, args.min_time)
+        write_results(args.output, results)
+    regressions = compare(baseline, results, args.threshold, args.min_seconds)
+    for regression in regressions:
+        print(f"regression {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,11 @@
 %load_ext autoreload
 %autoreload 2
 
+# Or, for faster startup and reloads, lazy import the snippet libraries
+# and only autoreload our own modules (see ipython_startup.py)
+%load_ext ipython_startup
+%startup_report
+
 # Use variables in shell
 name = "Steven"
 !echo {name}
@@ -18,3 +23,7 @@ name = "Steven"
 %edit
 
 # Use editor to write in cells: F2
+
+# Profile time and memory of a cell (see ipython_profile.py)
+%load_ext ipython_profile
+%%profile --top 15 --output profile.folded
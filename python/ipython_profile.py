@@ -0,0 +1,225 @@
+"""IPython extension with a ``%%profile`` cell magic.
+
+Samples the cell's call stack from a background thread and traces
+allocations with tracemalloc. Load with ``%load_ext ipython_profile``
+from a directory on the path.
+
+    %%profile --top 15 --output split.folded
+    list(SectionKFold().split(df, "section"))
+
+The folded stacks written by ``--output`` open in speedscope
+(https://www.speedscope.app/) or flamegraph.pl.
+"""
+from collections import Counter
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from types import FrameType
+from typing import List
+from typing import Tuple
+
+from IPython.core.magic import Magics
+from IPython.core.magic import cell_magic
+from IPython.core.magic import magics_class
+from IPython.core.magic_arguments import argument
+from IPython.core.magic_arguments import magic_arguments
+from IPython.core.magic_arguments import parse_argstring
+
+# (filename, function name, first line of function, current line)
+Frame = Tuple[str, str, int, int]
+_CELL_FILENAME = "<profile>"
+
+
+class _StackSampler(threading.Thread):
+    """Count the call stacks of a thread below a root frame."""
+
+    def __init__(self, thread_id: int, root: FrameType, interval: float) -> None:
+        """Constructor."""
+        super().__init__(name="stack_sampler", daemon=True)
+        self.thread_id = thread_id
+        self.root = root
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        """Sample until stopped."""
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack: List[Frame] = []
+            while frame is not None and frame is not self.root:
+                code = frame.f_code
+                stack.append(
+                    (
+                        code.co_filename,
+                        code.co_name,
+                        code.co_firstlineno,
+                        frame.f_lineno,
+                    )
+                )
+                frame = frame.f_back
+            # Skip samples taken after the cell returned
+            if stack and stack[-1][0] == _CELL_FILENAME:
+                self.stacks[tuple(reversed(stack))] += 1
+
+
+def _location(filename: str, lineno: int) -> str:
+    return f"{os.path.basename(filename)}:{lineno}"
+
+
+def _print_table(title: str, header: Tuple[str, ...], rows: list) -> None:
+    print(f"\n{title}")
+    print("  ".join(f"{cell:>8}" for cell in header[:-1]), header[-1])
+    for row in rows:
+        print("  ".join(f"{cell:>8}" for cell in row[:-1]), row[-1])
+
+
+def _format_bytes(size: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+@magics_class
+class ProfileMagics(Magics):
+    """Magics to profile time and memory."""
+
+    @magic_arguments()
+    @argument(
+        "-i",
+        "--interval",
+        type=float,
+        default=0.005,
+        help="Seconds between stack samples.",
+    )
+    @argument("-n", "--top", type=int, default=10, help="Rows per table.")
+    @argument(
+        "-o",
+        "--output",
+        default=None,
+        help="Write the samples as folded stacks to this file.",
+    )
+    @argument(
+        "--no-memory",
+        action="store_true",
+        help="Skip tracemalloc, which slows down allocation heavy code.",
+    )
+    @cell_magic
+    def profile(self, line: str, cell: str) -> None:
+        """Run the cell under a sampling profiler and tracemalloc."""
+        args = parse_argstring(self.profile, line)
+        code = compile(self.shell.transform_cell(cell), _CELL_FILENAME, "exec")
+        trace_memory = not args.no_memory
+        was_tracing = tracemalloc.is_tracing()
+        if trace_memory:
+            if was_tracing:
+                # Leave the peak of the running trace alone
+                before = tracemalloc.take_snapshot()
+            else:
+                tracemalloc.start()
+                before = None
+        sampler = _StackSampler(threading.get_ident(), sys._getframe(), args.interval)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            exec(code, self.shell.user_ns)
+        finally:
+            wall_time = time.perf_counter() - start
+            sampler.stopped.set()
+            sampler.join()
+            if trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                after = tracemalloc.take_snapshot().filter_traces(
+                    [
+                        tracemalloc.Filter(False, tracemalloc.__file__),
+                        tracemalloc.Filter(False, threading.__file__),
+                        tracemalloc.Filter(False, __file__),
+                    ]
+                )
+                if not was_tracing:
+                    tracemalloc.stop()
+        self._report(sampler.stacks, wall_time, args.top)
+        if trace_memory:
+            sites = (
+                after.statistics("lineno")
+                if before is None
+                else after.compare_to(before, "lineno")
+            )
+            if was_tracing:
+                print(
+                    f"\npeak traced memory since tracemalloc started:"
+                    f" {_format_bytes(peak)}"
+                )
+            else:
+                print(f"\npeak traced memory: {_format_bytes(peak)}")
+            _print_table(
+                "allocation sites (net)",
+                ("size", "count", "line"),
+                [
+                    (
+                        _format_bytes(getattr(stat, "size_diff", stat.size)),
+                        getattr(stat, "count_diff", stat.count),
+                        _location(site.filename, site.lineno),
+                    )
+                    for stat in sites[: args.top]
+                    for site in stat.traceback[:1]
+                ],
+            )
+        if args.output is not None:
+            with open(args.output, "w") as folded:
+                for stack, count in sampler.stacks.items():
+                    frames = ";".join(
+                        f"{name} ({_location(filename, firstlineno)})"
+                        for filename, name, firstlineno, _ in stack
+                    )
+                    folded.write(f"{frames} {count}\n")
+            print(f"\nwrote folded stacks to {args.output}")
+
+    @staticmethod
+    def _report(stacks: Counter, wall_time: float, top: int) -> None:
+        """Print the functions and lines the samples landed in."""
+        n_samples = sum(stacks.values())
+        print(f"wall time: {wall_time:.3f} s, samples: {n_samples}")
+        if not n_samples:
+            return
+        own: Counter = Counter()
+        total: Counter = Counter()
+        lines: Counter = Counter()
+        for stack, count in stacks.items():
+            filename, name, firstlineno, lineno = stack[-1]
+            own[name, filename, firstlineno] += count
+            lines[name, filename, lineno] += count
+            for function in {frame[:3] for frame in stack}:
+                total[function[1], function[0], function[2]] += count
+        _print_table(
+            "functions",
+            ("own %", "total %", "function"),
+            [
+                (
+                    f"{own[function] / n_samples:.1%}",
+                    f"{count / n_samples:.1%}",
+                    f"{function[0]} ({_location(function[1], function[2])})",
+                )
+                for function, count in total.most_common(top)
+            ],
+        )
+        _print_table(
+            "lines",
+            ("own %", "line"),
+            [
+                (
+                    f"{count / n_samples:.1%}",
+                    f"{name} ({_location(filename, lineno)})",
+                )
+                for (name, filename, lineno), count in lines.most_common(top)
+            ],
+        )
+
+
+def load_ipython_extension(ip) -> None:
+    """Load the extension in IPython."""
+    ip.register_magics(ProfileMagics)
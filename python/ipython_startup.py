@@ -0,0 +1,184 @@
+"""IPython extension for faster kernel startup and autoreload cycles.
+
+Replaces the eager imports and the blanket ``%autoreload 2`` in
+ipython.py. Load with ``%load_ext ipython_startup`` from a directory on
+the path, or list it in ``c.InteractiveShellApp.extensions``.
+"""
+import importlib
+import importlib.util
+import statistics
+import sys
+import threading
+import time
+import warnings
+from types import ModuleType
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from IPython.core.interactiveshell import InteractiveShell
+
+# Names to define in the notebook and the modules they refer to
+LAZY_IMPORTS = {
+    "alt": "altair",
+    "go": "plotly.graph_objs",
+    "xgboost": "xgboost",
+    "sklearn": "sklearn",
+}
+# Load LAZY_IMPORTS in a background thread after the first cell, instead
+# of on first use
+WARM_IMPORTS = False
+# Our own modules, the only ones autoreload checks before each cell
+AUTORELOAD_MODULES: List[str] = []
+
+_timings: Dict[str, float] = {}
+_reload_timings: List[float] = []
+_reload_start: Optional[float] = None
+_warm_thread: Optional[threading.Thread] = None
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Import a module that only loads on first attribute access.
+
+    Parameters
+    ----------
+    name : str
+        The full name of the module.
+
+    Returns
+    -------
+    ModuleType
+        The module, which is also registered in sys.modules so later
+        ``import name`` statements return it.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def warm_imports(modules: List[ModuleType]) -> threading.Thread:
+    """
+    Load lazy modules in a background thread.
+
+    LazyLoader modules aren't safe to load from two threads at once, so
+    cells should wait for the thread before running, as the extension
+    does.
+
+    Parameters
+    ----------
+    modules : List[ModuleType]
+        The modules from lazy_import.
+
+    Returns
+    -------
+    threading.Thread
+        The started thread.
+    """
+
+    def warm() -> None:
+        for module in modules:
+            start = time.perf_counter()
+            # Any attribute access triggers the load
+            getattr(module, "__file__", None)
+            _timings[f"warm {module.__name__}"] = time.perf_counter() - start
+
+    thread = threading.Thread(target=warm, name="warm_imports", daemon=True)
+    thread.start()
+    return thread
+
+
+def _start_warming(modules: List[ModuleType]) -> Callable[..., None]:
+    def start(result=None) -> None:
+        global _warm_thread
+        if _warm_thread is None:
+            _warm_thread = warm_imports(modules)
+
+    return start
+
+
+def _wait_for_warming(info=None) -> None:
+    if _warm_thread is not None and _warm_thread.is_alive():
+        start = time.perf_counter()
+        _warm_thread.join()
+        _timings["cell waited for warming"] = time.perf_counter() - start
+
+
+def _start_reload_timer(info=None) -> None:
+    global _reload_start
+    _reload_start = time.perf_counter()
+
+
+def _stop_reload_timer(info=None) -> None:
+    if _reload_start is not None:
+        _reload_timings.append(time.perf_counter() - _reload_start)
+
+
+def startup_report(line: str = "") -> None:
+    """Print the extension's startup time and per-cell autoreload overhead."""
+    for name, seconds in _timings.items():
+        print(f"{name:<40} {seconds * 1000:>10.1f} ms")
+    if _reload_timings:
+        print(
+            f"{'autoreload per cell (mean)':<40}"
+            f" {statistics.mean(_reload_timings) * 1000:>10.2f} ms"
+        )
+        print(
+            f"{'autoreload per cell (max)':<40}"
+            f" {max(_reload_timings) * 1000:>10.2f} ms"
+        )
+        print(f"{'cells':<40} {len(_reload_timings):>10}")
+
+
+def load_ipython_extension(ip: InteractiveShell) -> None:
+    """Load the extension in IPython."""
+    start = time.perf_counter()
+    ip.run_line_magic("config", "InlineBackend.figure_format = 'retina'")
+    # pre_run_cell callbacks run in registration order, so these two
+    # bracket autoreload's module check
+    ip.events.register("pre_run_cell", _start_reload_timer)
+    ip.run_line_magic("load_ext", "autoreload")
+    ip.events.register("pre_run_cell", _stop_reload_timer)
+    auto_reload = ip.magics_manager.registry["AutoreloadMagics"]
+    # If autoreload was already loaded, e.g. by %load_ext autoreload, its
+    # check runs before the timers, so move it in front of the last one.
+    # IPython may have wrapped it when registering.
+    callbacks = ip.events.callbacks["pre_run_cell"]
+    check = next(
+        callback
+        for callback in callbacks
+        if getattr(callback, "__wrapped__", callback) == auto_reload.pre_run_cell
+    )
+    callbacks.remove(check)
+    callbacks.insert(len(callbacks) - 1, check)
+    ip.run_line_magic("autoreload", "1")
+    for name in AUTORELOAD_MODULES:
+        ip.run_line_magic("aimport", name)
+    lazy_modules = {}
+    for alias, name in LAZY_IMPORTS.items():
+        try:
+            lazy_modules[alias] = lazy_import(name)
+        except ModuleNotFoundError:
+            warnings.warn(f"Skipping lazy import of {name}, it isn't installed.")
+    ip.push(lazy_modules)
+    # After each cell autoreload reads __file__ of new modules, which
+    # would load the lazy modules, so mark them as seen. Any attribute
+    # access loads them, so use the configured names.
+    auto_reload.loaded_modules.update(LAZY_IMPORTS[alias] for alias in lazy_modules)
+    if WARM_IMPORTS:
+        # Warm once the first cell has run, so startup isn't slowed down
+        ip.events.register(
+            "post_run_cell", _start_warming(list(lazy_modules.values()))
+        )
+        ip.events.register("pre_run_cell", _wait_for_warming)
+    ip.register_magic_function(startup_report, magic_kind="line")
+    _timings["load extension"] = time.perf_counter() - start
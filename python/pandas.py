@@ -1,5 +1,26 @@
 # Pandas snippets
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+import os
+import timeit
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from numpy import ndarray
+import numpy as np
+from numpy.typing import ArrayLike
 import pandas as pd
+from pandas import DataFrame
+from pandas import Series
+from pandas.api.extensions import ExtensionArray
+import pyarrow.parquet
 
 # if else conditional
 np.where(df.a == 1, "is_one", "not_one")
@@ -17,6 +38,136 @@ np.select(
     default="is_not_one_or_two",
 )
 
+
+def _as_mask(result: Union[Series, ndarray, ExtensionArray]) -> ndarray:
+    """Convert a condition's result to a NumPy mask where missing is False."""
+    if isinstance(result, (Series, ExtensionArray)):
+        return result.to_numpy(dtype=bool, na_value=False)
+    return np.asarray(result, dtype=bool)
+
+
+def case_when(
+    df: DataFrame,
+    conditions: List[
+        Callable[[Dict[str, Union[ndarray, ExtensionArray]]], ArrayLike]
+    ],
+    choices: List[str],
+    default: str,
+    columns: Optional[List[str]] = None,
+) -> pd.Categorical:
+    """
+    SQL-like CASE with first-match semantics and categorical output.
+
+    Unlike np.select, the result stores small integer codes instead of
+    one Python string per row. Conditions only see the values of the
+    columns they use, and once few enough rows are left unmatched, later
+    conditions only see those rows.
+
+    Parameters
+    ----------
+    df : DataFrame
+        The data to evaluate the conditions on.
+    conditions : List[Callable[[Dict[str, Union[ndarray, ExtensionArray]]], ArrayLike]]
+        Functions that take the values of some rows of columns, by column
+        name, and return a boolean mask for them, e.g.
+        ``lambda c: (c["a"] == 1) & (c["b"] > 0)``. NumPy dtypes are
+        passed as an ndarray, others as their pandas array. Missing
+        results count as no match, as NULL does in SQL.
+    choices : List[str]
+        The label for each condition. Labels may repeat.
+    default : str
+        The label for rows that match no condition.
+    columns : Optional[List[str]]
+        The columns the conditions use. Uses all columns by default, but
+        every column is copied when rows are dropped, so list them for
+        wide data.
+
+    Returns
+    -------
+    pd.Categorical
+        The label of the first matching condition for each row.
+    """
+    if len(conditions) != len(choices):
+        raise ValueError(
+            f"Got {len(conditions)} conditions but {len(choices)} choices."
+            " They must be the same length."
+        )
+    categories = list(dict.fromkeys([*choices, default]))
+    choice_codes = [categories.index(choice) for choice in choices]
+    default_code = categories.index(default)
+    codes = np.full(
+        df.shape[0], default_code, dtype=np.min_scalar_type(-len(categories))
+    )
+    values = {
+        column: df[column].to_numpy()
+        if isinstance(df[column].dtype, np.dtype)
+        else df[column].array
+        for column in (df.columns if columns is None else columns)
+    }
+    # Rows of codes that values refer to, None while values is all of df
+    positions = None
+    unmatched = np.ones(df.shape[0], dtype=bool)
+    n_unmatched = df.shape[0]
+    for condition, choice_code in zip(conditions, choice_codes):
+        if n_unmatched == 0:
+            break
+        # Copying out the unmatched rows costs about as much as a
+        # condition, so only compact once most rows have matched
+        if n_unmatched < len(unmatched) // 4:
+            keep = np.flatnonzero(unmatched)
+            values = {column: array[keep] for column, array in values.items()}
+            positions = keep if positions is None else positions[keep]
+            unmatched = np.ones(n_unmatched, dtype=bool)
+        is_match = _as_mask(condition(values)) & unmatched
+        if positions is None:
+            # Rows match at most once, so adding the offset from the
+            # default code assigns it without a scattered write
+            codes += np.multiply(
+                is_match, choice_code - default_code, dtype=codes.dtype
+            )
+        else:
+            codes[positions[is_match]] = choice_code
+        unmatched &= ~is_match
+        n_unmatched = np.count_nonzero(unmatched)
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+case_when(
+    df,
+    [
+        lambda c: c["a"] == 1,
+        lambda c: (c["a"] == 2) & (c["b"] > 0),
+    ],
+    [
+        "is_one",
+        "is_two_and_b_positive",
+    ],
+    default="other",
+    columns=["a", "b"],
+)
+
+# Benchmark CASE against np.select: 100M rows and 20 branches
+bench_df = pd.DataFrame(
+    {"a": np.random.default_rng(0).integers(0, 25, size=100_000_000, dtype=np.int8)}
+)
+bench_choices = [f"is_{value}" for value in range(20)]
+timeit.timeit(
+    lambda: np.select(
+        [bench_df.a == value for value in range(20)], bench_choices, default="other"
+    ),
+    number=1,
+)
+timeit.timeit(
+    lambda: case_when(
+        bench_df,
+        [lambda c, value=value: c["a"] == value for value in range(20)],
+        bench_choices,
+        default="other",
+        columns=["a"],
+    ),
+    number=1,
+)
+
 # Plotting backend
 pd.options.plotting.backend = "altair"  # or "plotly"
 
@@ -25,3 +176,275 @@ df.groupby("A").agg(
     sum_b=("B", "sum"),
     std_c=("C", "std")
 )
+
+
+def _partial_agg(
+    chunk: DataFrame, by: Union[str, List[str]], stats: Dict[str, List[str]]
+) -> DataFrame:
+    """Mergeable per-group count, sum, M2, min, or max of some columns of a chunk."""
+    grouped = chunk.groupby(by)
+    partial = {}
+    for name, columns in stats.items():
+        if name == "m2":
+            partial[name] = grouped[columns].var(ddof=0) * grouped[columns].count()
+        else:
+            partial[name] = getattr(grouped[columns], name)()
+    return pd.concat(partial, axis=1)
+
+
+def _stat(state: DataFrame, name: str) -> DataFrame:
+    """One statistic of a partial state, with a column per aggregated column."""
+    return state.xs(name, axis=1, level=0)
+
+
+def _merge_partials(partials: List[DataFrame]) -> DataFrame:
+    """Combine partial states with Chan's parallel variance update."""
+    stacked = pd.concat(partials)
+    levels = list(range(stacked.index.nlevels))
+    merged = {}
+    for name in stacked.columns.unique(level=0):
+        grouped = _stat(stacked, name).groupby(level=levels)
+        if name == "m2":
+            columns = _stat(stacked, "m2").columns
+            count = _stat(stacked, "count")[columns]
+            sums = _stat(stacked, "sum")[columns]
+            mean = sums.groupby(level=levels).sum() / count.groupby(level=levels).sum()
+            shift = count * (sums / count - mean.reindex(stacked.index)) ** 2
+            merged[name] = (
+                (_stat(stacked, "m2").fillna(0) + shift.fillna(0))
+                .groupby(level=levels)
+                .sum()
+            )
+        elif name in ("min", "max"):
+            merged[name] = getattr(grouped, name)()
+        else:
+            merged[name] = grouped.sum()
+    return pd.concat(merged, axis=1)
+
+
+def streaming_agg(
+    chunks: Iterable[DataFrame],
+    by: Union[str, List[str]],
+    n_jobs: int = 1,
+    **named_aggs: Tuple[str, str],
+) -> DataFrame:
+    """
+    Out-of-core named aggregation over a stream of chunks.
+
+    Takes the same named aggregations as ``DataFrame.groupby(by).agg``.
+    Each chunk is reduced to mergeable per-group states, optionally in a
+    process pool, so only a few chunks and one row per group are held in
+    memory.
+
+    Parameters
+    ----------
+    chunks : Iterable[DataFrame]
+        The data, e.g. from ``iter_row_groups`` or ``pd.read_csv(...,
+        chunksize=...)``.
+    by : Union[str, List[str]]
+        The column names to group by.
+    n_jobs : int, default=1
+        The number of worker processes, or -1 for one per CPU. With 1 the
+        chunks are aggregated in the current process. Workers must be
+        able to import this function, so on platforms that spawn workers
+        (macOS and Windows) it can't be defined in a notebook.
+    **named_aggs : Tuple[str, str]
+        Output column names mapped to ``(column, aggregation)``, where
+        aggregation is one of sum, count, mean, var, std, min, or max.
+        Statistics are only computed for the aggregations asked for, so
+        count, min, and max also work on e.g. string and datetime columns.
+
+    Returns
+    -------
+    DataFrame
+        The aggregations indexed by group, as pandas would return.
+    """
+    # The mergeable statistics each aggregation is computed from
+    agg_stats = {
+        "sum": ["sum"],
+        "count": ["count"],
+        "mean": ["count", "sum"],
+        "var": ["count", "sum", "m2"],
+        "std": ["count", "sum", "m2"],
+        "min": ["min"],
+        "max": ["max"],
+    }
+    stats: Dict[str, List[str]] = {}
+    for name, (column, agg) in named_aggs.items():
+        if agg not in agg_stats:
+            raise ValueError(
+                f"{agg} is an invalid aggregation for {name}."
+                f" Input one of {sorted(agg_stats)}"
+            )
+        # Only compute what the aggregation needs, so e.g. count and max
+        # work on columns that can't be summed
+        for stat in agg_stats[agg]:
+            if column not in stats.setdefault(stat, []):
+                stats[stat].append(column)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    state = None
+    if n_jobs == 1:
+        for chunk in chunks:
+            partial = _partial_agg(chunk, by, stats)
+            state = partial if state is None else _merge_partials([state, partial])
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            pending = set()
+            for chunk in chunks:
+                pending.add(executor.submit(_partial_agg, chunk, by, stats))
+                if len(pending) < 2 * n_jobs:
+                    continue
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                state = _merge_partials(
+                    [partial for partial in [state] if partial is not None]
+                    + [future.result() for future in done]
+                )
+            if pending:
+                state = _merge_partials(
+                    [partial for partial in [state] if partial is not None]
+                    + [future.result() for future in pending]
+                )
+    if state is None:
+        raise ValueError("chunks must contain at least one DataFrame.")
+    results = {}
+    for name, (column, agg) in named_aggs.items():
+        if agg in ("sum", "count", "min", "max"):
+            results[name] = _stat(state, agg)[column]
+        elif agg == "mean":
+            results[name] = _stat(state, "sum")[column] / _stat(state, "count")[column]
+        else:
+            count = _stat(state, "count")[column]
+            var = (_stat(state, "m2")[column] / (count - 1)).where(count > 1)
+            results[name] = var if agg == "var" else var**0.5
+    return pd.DataFrame(results)
+
+
+def iter_row_groups(
+    path: str, columns: Optional[List[str]] = None
+) -> Iterator[DataFrame]:
+    """
+    Read a Parquet file one row group at a time.
+
+    Parameters
+    ----------
+    path : str
+        The path to the Parquet file.
+    columns : Optional[List[str]]
+        The columns to read. Reads all columns by default.
+
+    Yields
+    ------
+    DataFrame
+        The next row group.
+    """
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    for row_group in range(parquet_file.num_row_groups):
+        yield parquet_file.read_row_group(row_group, columns=columns).to_pandas()
+
+
+# Same as the named aggregation above, without loading the whole file
+streaming_agg(
+    iter_row_groups("data.parquet", columns=["A", "B", "C"]),
+    "A",
+    n_jobs=-1,
+    sum_b=("B", "sum"),
+    std_c=("C", "std"),
+)
+
+
+def merge_any(
+    left: DataFrame,
+    right: DataFrame,
+    left_on: str,
+    right_on: List[str],
+    suffixes: Tuple[str, str] = ("_x", "_y"),
+) -> DataFrame:
+    """
+    Inner join where the left key equals any of several right columns.
+
+    The pandas version of ``JOIN b ON a.id = b.id1 OR a.id = b.id2``.
+    Runs one hash merge of row ids per right column, then drops the row
+    pairs matched by more than one column, instead of filtering a cross
+    join.
+
+    Parameters
+    ----------
+    left : DataFrame
+        The left data.
+    right : DataFrame
+        The right data.
+    left_on : str
+        The key column in left.
+    right_on : List[str]
+        The columns in right that may match the key.
+    suffixes : Tuple[str, str], default=("_x", "_y")
+        Suffixes added to column names that are in both left and right.
+
+    Returns
+    -------
+    DataFrame
+        Each matching pair of rows once, ordered by left then right row.
+    """
+    # Missing keys never match, as in SQL
+    left_keys = pd.DataFrame(
+        {"key": left[left_on].to_numpy(), "left_row": np.arange(left.shape[0])}
+    ).dropna()
+    pairs = pd.concat(
+        [
+            left_keys.merge(
+                pd.DataFrame(
+                    {
+                        "key": right[column].to_numpy(),
+                        "right_row": np.arange(right.shape[0]),
+                    }
+                ).dropna(),
+                on="key",
+            )[["left_row", "right_row"]]
+            for column in right_on
+        ],
+        ignore_index=True,
+    )
+    pairs = pairs.drop_duplicates().sort_values(["left_row", "right_row"])
+    overlap = left.columns.intersection(right.columns)
+    return pd.concat(
+        [
+            left.take(pairs["left_row"])
+            .rename(columns={column: f"{column}{suffixes[0]}" for column in overlap})
+            .reset_index(drop=True),
+            right.take(pairs["right_row"])
+            .rename(columns={column: f"{column}{suffixes[1]}" for column in overlap})
+            .reset_index(drop=True),
+        ],
+        axis=1,
+    )
+
+
+# Join on a.id = b.id1 OR a.id = b.id2
+merge_any(df_a, df_b, left_on="id", right_on=["id1", "id2"])
+
+# Benchmark against filtering a cross join
+# The cross join needs n² rows, so compare at 10k rows and time merge_any
+# alone at 10M
+bench_a = pd.DataFrame(
+    {"id": np.random.default_rng(0).integers(0, 10_000_000, size=10_000_000)}
+)
+bench_b = pd.DataFrame(
+    {
+        "id1": np.random.default_rng(1).integers(0, 10_000_000, size=10_000_000),
+        "id2": np.random.default_rng(2).integers(0, 10_000_000, size=10_000_000),
+    }
+)
+timeit.timeit(
+    lambda: bench_a.head(10_000)
+    .merge(bench_b.head(10_000), how="cross")
+    .query("id == id1 or id == id2"),
+    number=1,
+)
+timeit.timeit(
+    lambda: merge_any(
+        bench_a.head(10_000), bench_b.head(10_000), "id", ["id1", "id2"]
+    ),
+    number=1,
+)
+timeit.timeit(lambda: merge_any(bench_a, bench_b, "id", ["id1", "id2"]), number=1)
@@ -72,9 +72,6 @@ material_theme = go.layout.Template(
                     "type": "heatmap",
                 }
             ],
-            "heatmapgl": [
-                {"colorbar": {"outlinewidth": 0, "ticks": ""}, "type": "heatmapgl"}
-            ],
             "histogram": [
                 {
                     "marker": {"colorbar": {"outlinewidth": 0, "ticks": ""}},
@@ -150,10 +147,10 @@ material_theme = go.layout.Template(
                     "type": "scattergl",
                 }
             ],
-            "scattermapbox": [
+            "scattermap": [
                 {
                     "marker": {"colorbar": {"outlinewidth": 0, "ticks": ""}},
-                    "type": "scattermapbox",
+                    "type": "scattermap",
                 }
             ],
             "scatterpolar": [
@@ -1,14 +1,85 @@
 """Snippets for scikit-learn."""
+from typing import Generator
 from typing import List
-
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from numpy import ndarray
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from pandas import Series
 from sklearn.base import BaseEstimator
 from sklearn.compose import ColumnTransformer
 import sklearn.compose
+import sklearn.model_selection
 from sklearn.pipeline import Pipeline
 import sklearn.pipeline
+import sklearn.preprocessing
 import sklearn.impute
 
 
+def shrink_features(
+    X: DataFrame,
+    cont_features: List[str],
+    cat_features: List[str],
+    drop_features: List[str],
+    downcast_floats: bool = False,
+) -> Tuple[DataFrame, int]:
+    """
+    Shrink the memory of a frame before it enters the preprocess pipe.
+
+    Keeps only the continuous and categorical features, downcasts
+    integers to the smallest type that holds them, and stores
+    categorical features as the category dtype. These conversions are
+    lossless and scikit-learn converts them back to the same values, so
+    the output of make_preprocess_pipe is unchanged. Pass an empty
+    drop_features to make_preprocess_pipe afterwards since the dropped
+    columns are gone.
+
+    Parameters
+    ----------
+    X : DataFrame
+        The feature matrix.
+    cont_features : List[str]
+        The names of the continuous features.
+    cat_features : List[str]
+        The names of categorical features.
+    drop_features : List[str]
+        The names of features to drop.
+    downcast_floats : bool, default=False
+        Whether to store floats as float32 when no value changes. The
+        imputer and scaler then compute in float32, which changes
+        make_preprocess_pipe's output slightly, but not XGBoost's, which
+        stores features as float32 anyway.
+
+    Returns
+    -------
+    DataFrame
+        The shrunk feature matrix.
+    int
+        The number of bytes saved.
+    """
+    original_bytes = X.memory_usage(deep=True).sum()
+    X_small = X.drop(columns=drop_features)[[*cont_features, *cat_features]].copy()
+    for feature in cont_features:
+        column = X_small[feature]
+        if pd.api.types.is_bool_dtype(column):
+            continue
+        if pd.api.types.is_unsigned_integer_dtype(column):
+            X_small[feature] = pd.to_numeric(column, downcast="unsigned")
+        elif pd.api.types.is_integer_dtype(column):
+            X_small[feature] = pd.to_numeric(column, downcast="integer")
+        elif downcast_floats and column.dtype == np.float64:
+            column_32 = column.astype(np.float32)
+            if ((column_32 == column) | column.isna()).all():
+                X_small[feature] = column_32
+    for feature in cat_features:
+        X_small[feature] = X_small[feature].astype("category")
+    return X_small, int(original_bytes - X_small.memory_usage(deep=True).sum())
+
+
 def make_preprocess_pipe(
     cont_features: List[str], cat_features: List[str], drop_features: List[str]
 ) -> ColumnTransformer:
@@ -155,7 +226,7 @@ def get_categorical_feature_names(
     encoded_feature_names = (
         pipeline["preprocess"]
         .named_transformers_["cat_features"]["encode"]
-        .get_feature_names()
+        .get_feature_names_out()
     )
     categorical_feature_names = []
     for feature_name in encoded_feature_names:
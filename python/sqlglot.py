@@ -0,0 +1,240 @@
+"""Snippets for sqlglot https://github.com/tobymao/sqlglot."""
+from collections import Counter
+import random
+import sqlite3
+import time
+from typing import Any
+from typing import Dict
+from typing import List
+
+import sqlglot
+from sqlglot import exp
+
+
+def _flatten(condition: exp.Expression, connector: type) -> List[exp.Expression]:
+    """Split a condition into its operands of connector, through parentheses."""
+    condition = condition.unnest()
+    if isinstance(condition, connector):
+        return _flatten(condition.left, connector) + _flatten(
+            condition.right, connector
+        )
+    return [condition]
+
+
+def _expand_or_joins(select: exp.Select, distinct: bool) -> List[exp.Select]:
+    """Split a select into one select per disjunct of each OR join."""
+    for join_index, join in enumerate(select.args.get("joins") or []):
+        on = join.args.get("on")
+        if on is None or join.side or join.kind not in ("", "INNER"):
+            continue
+        conjuncts = _flatten(on, exp.And)
+        or_index = next(
+            (
+                index
+                for index, conjunct in enumerate(conjuncts)
+                if isinstance(conjunct, exp.Or)
+            ),
+            None,
+        )
+        if or_index is None:
+            continue
+        disjuncts = _flatten(conjuncts[or_index], exp.Or)
+        rest = conjuncts[:or_index] + conjuncts[or_index + 1 :]
+        branches = []
+        for disjunct_index, disjunct in enumerate(disjuncts):
+            condition = [disjunct]
+            if not distinct and disjunct_index:
+                # Skip pairs an earlier branch already matched. The CASE
+                # keeps pairs where the earlier predicates are NULL, which
+                # the OR join also keeps, and needs no boolean values, so
+                # it works in every dialect.
+                earlier = exp.or_(*disjuncts[:disjunct_index])
+                condition.append(
+                    exp.EQ(
+                        this=exp.Case()
+                        .when(earlier, exp.Literal.number(1))
+                        .else_(exp.Literal.number(0)),
+                        expression=exp.Literal.number(0),
+                    )
+                )
+            branch = select.copy()
+            branch.args["joins"][join_index].set("on", exp.and_(*condition, *rest))
+            branches.extend(_expand_or_joins(branch, distinct))
+        return branches
+    return [select]
+
+
+def _has_aggregate(select: exp.Select) -> bool:
+    """Whether the projection of a select aggregates, ignoring subqueries."""
+    return any(
+        isinstance(node, (exp.AggFunc, exp.Window))
+        for expression in select.expressions
+        for node in expression.walk(
+            prune=lambda node, *_: isinstance(node, (exp.Select, exp.Subquery))
+        )
+    )
+
+
+def _rewrite_select(select: exp.Select, distinct: bool) -> exp.Expression:
+    """Rewrite the OR joins of a select and of its subqueries and CTEs."""
+    for node in list(select.find_all(exp.Subquery, exp.CTE)):
+        if isinstance(node.this, exp.Select) and node.parent_select is select:
+            node.set("this", _rewrite_select(node.this, distinct))
+    # The branches share the WITH clause, which can only come once, first
+    body = select.copy()
+    with_ = next(
+        (value for value in body.args.values() if isinstance(value, exp.With)), None
+    )
+    if with_ is not None:
+        with_key = with_.arg_key
+        with_.pop()
+    branches = _expand_or_joins(body, distinct)
+    if len(branches) == 1:
+        return select
+    if any(
+        select.args.get(arg) for arg in ("group", "having", "order", "limit", "offset")
+    ) or _has_aggregate(select):
+        raise ValueError(
+            "Cannot rewrite a query that groups, aggregates, orders, or limits"
+            " the joined rows. Move the join into a subquery in FROM first."
+        )
+    union = branches[0]
+    for branch in branches[1:]:
+        union = exp.union(
+            union, branch, distinct=distinct or bool(select.args.get("distinct"))
+        )
+    if with_ is not None:
+        union.set(with_key, with_)
+    return union
+
+
+def rewrite_or_joins(sql: str, dialect: str = "sqlite", distinct: bool = False) -> str:
+    """
+    Rewrite inner joins on OR conditions as a UNION of equi-joins.
+
+    ``JOIN b ON a.id = b.id1 OR a.id = b.id2`` usually can't use an
+    index, while each branch of the union can. The OR may also be one
+    of several conditions joined with AND, which are kept in every
+    branch. Joins in subqueries and CTEs are rewritten the same way.
+    Outer joins are left as is. By default the branches are
+    combined with UNION ALL, and each later branch excludes the pairs
+    an earlier branch matched, so row counts match the original query
+    even when the tables hold duplicate rows.
+
+    Parameters
+    ----------
+    sql : str
+        The query to rewrite. Must be a single SELECT.
+    dialect : str, default="sqlite"
+        The SQL dialect to read and write.
+    distinct : bool, default=False
+        Whether to combine the branches with UNION instead. This is
+        only correct if the selected columns identify each joined pair,
+        e.g. they include a unique key of each table.
+
+    Returns
+    -------
+    str
+        The rewritten query, or the original query if none of its inner
+        join conditions contain an OR.
+    """
+    select = sqlglot.parse_one(sql, read=dialect)
+    if not isinstance(select, exp.Select):
+        raise ValueError(f"Can only rewrite a single SELECT, got {select.key}.")
+    return _rewrite_select(select, distinct).sql(dialect=dialect)
+
+
+def make_or_join_tables(
+    connection: sqlite3.Connection, n_rows: int, seed: int = 0
+) -> None:
+    """
+    Create table_a(id, value) and table_b(id1, id2, value) for OR joins.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        The database to create the tables in.
+    n_rows : int
+        The number of rows in each table. Ids are drawn from the same
+        range so roughly one row of table_b matches each id.
+    seed : int, default=0
+        The random seed.
+    """
+    rng = random.Random(seed)
+    connection.executescript(
+        """
+        DROP TABLE IF EXISTS table_a;
+        DROP TABLE IF EXISTS table_b;
+        CREATE TABLE table_a (id INTEGER, value REAL);
+        CREATE TABLE table_b (id1 INTEGER, id2 INTEGER, value REAL);
+        """
+    )
+    connection.executemany(
+        "INSERT INTO table_a VALUES (?, ?)",
+        ((rng.randrange(n_rows), rng.random()) for _ in range(n_rows)),
+    )
+    connection.executemany(
+        "INSERT INTO table_b VALUES (?, ?, ?)",
+        (
+            (rng.randrange(n_rows), rng.randrange(n_rows), rng.random())
+            for _ in range(n_rows)
+        ),
+    )
+    connection.executescript(
+        """
+        CREATE INDEX table_b_id1 ON table_b (id1);
+        CREATE INDEX table_b_id2 ON table_b (id2);
+        ANALYZE;
+        """
+    )
+    connection.commit()
+
+
+def benchmark_or_join(
+    connection: sqlite3.Connection, sql: str, repeat: int = 5, distinct: bool = False
+) -> Dict[str, Any]:
+    """
+    Compare the query plan and latency of an OR join and its rewrite.
+
+    Parameters
+    ----------
+    connection : sqlite3.Connection
+        The database to run the queries on.
+    sql : str
+        The query with an OR join.
+    repeat : int, default=5
+        The number of times to run each query. The fastest run is kept.
+    distinct : bool, default=False
+        Passed on to ``rewrite_or_joins``.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The sql, plan, and seconds of the "original" and "rewritten"
+        queries, and whether they returned the same rows.
+    """
+    report: Dict[str, Any] = {}
+    rows = {}
+    for name, query in (
+        ("original", sql),
+        ("rewritten", rewrite_or_joins(sql, distinct=distinct)),
+    ):
+        plan = [row[-1] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}")]
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            rows[name] = connection.execute(query).fetchall()
+            timings.append(time.perf_counter() - start)
+        report[name] = {"sql": query, "plan": plan, "seconds": min(timings)}
+    report["same_results"] = Counter(rows["original"]) == Counter(rows["rewritten"])
+    return report
+
+
+# Use with
+# connection = sqlite3.connect(":memory:")
+# make_or_join_tables(connection, n_rows=100_000)
+# benchmark_or_join(
+#     connection,
+#     "SELECT a.id, b.value FROM table_a AS a"
+#     " INNER JOIN table_b AS b ON a.id = b.id1 OR a.id = b.id2",
+# )
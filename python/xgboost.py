@@ -7,6 +7,7 @@ from typing import Union
 from numpy import ndarray
 from pandas import DataFrame
 from pandas import Series
+import sklearn.model_selection
 import xgboost
 from xgboost import XGBClassifier
 from xgboost import XGBRegressor
@@ -52,9 +53,21 @@ def early_stop_xgb(
     if "classifier".startswith(model_type.lower()) or "clf".startswith(
         model_type.lower()
     ):
-        xgb = xgboost.XGBClassifier(n_jobs=-1, *args, **kwargs)
+        xgb = xgboost.XGBClassifier(
+            n_jobs=-1,
+            eval_metric=eval_metric,
+            early_stopping_rounds=early_stopping_rounds,
+            *args,
+            **kwargs,
+        )
     elif "regressor".startswith(model_type.lower()):
-        xgb = xgboost.XGBRegressor(n_jobs=-1, *args, **kwargs)
+        xgb = xgboost.XGBRegressor(
+            n_jobs=-1,
+            eval_metric=eval_metric,
+            early_stopping_rounds=early_stopping_rounds,
+            *args,
+            **kwargs,
+        )
     else:
         raise ValueError(
             f"{model_type} is an invalid model_type value."
@@ -63,8 +76,6 @@ def early_stop_xgb(
     xgb.fit(
         X_train,
         y_train,
-        eval_metric=eval_metric,
-        early_stopping_rounds=early_stopping_rounds,
         eval_set=[(X_test, y_test)],
         verbose=True,
     )
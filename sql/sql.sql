@@ -7,6 +7,14 @@ FROM
     INNER JOIN table_b AS b ON a.id = b.id1
     OR a.id = b.id2
 -- do instead
+-- (python/sqlglot.py rewrite_or_joins does this automatically)
 FROM
     table_a AS a
-    INNER JOIN table b ON a.id = b.id2
+    INNER JOIN table_b AS b ON a.id = b.id1
+UNION ALL
+...
+FROM
+    table_a AS a
+    INNER JOIN table_b AS b ON a.id = b.id2
+    -- keep rows the first branch already matched out of the second
+    AND NOT COALESCE(a.id = b.id1, FALSE)